@@ -1,20 +1,26 @@
 import os
+import atexit
 import json
+import hashlib
+import random
 import re
+import sqlite3
 import time
 import threading
-from urllib.parse import urlparse, parse_qs
+import zlib
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from functools import lru_cache
+from typing import Literal
 
 import httpx
-from dash import Dash, html, dcc, dash_table, Input, Output, State
-from youtube_transcript_api import (
-    YouTubeTranscriptApi,
-    TranscriptsDisabled,
-    NoTranscriptFound,
-    CouldNotRetrieveTranscript,
-    RequestBlocked,
-    IpBlocked,
-)
+import msgspec
+try:
+    import orjson
+except ImportError:  # optional – Fallback auf stdlib json
+    orjson = None
+from dash import Dash, html, dcc, dash_table, Input, Output, State, no_update
+from flask import jsonify
 
 class TranscriptFetchError(RuntimeError):
     """Technischer Fehler beim Laden der Untertitel."""
@@ -24,16 +30,46 @@ class TranscriptUnavailableError(RuntimeError):
     """Video enthält keine nutzbaren Untertitel."""
 
 
+class YouTubeThrottledError(TranscriptFetchError):
+    """Eigenes Abruf-Limit erreicht – kein Fehler von YouTube, wird daher nicht gecacht."""
+
+
 # =========================
 # Konfiguration / Globals
 # =========================
 OPENAI_KEY = os.getenv("OPENAI_API_KEY")  # <--- NIEMALS hardcoden
-# Serialisierung: Ein Job zur Zeit (verhindert parallele Transkript-Fetches)
-FACTCHECK_LOCK = threading.Lock()
+# Wiederverwendbarer HTTP-Client für OpenAI (Keep-Alive + HTTP/2 statt TLS-Handshake pro Aufruf)
+HTTPX_CLIENT = httpx.Client(
+    base_url="https://api.openai.com",
+    timeout=httpx.Timeout(connect=10, read=120, write=30, pool=5),
+    limits=httpx.Limits(max_keepalive_connections=10),
+    http2=True,
+    # Content-Type bewusst nicht global: Datei-Uploads brauchen multipart/form-data
+    headers={"Authorization": f"Bearer {OPENAI_KEY}"} if OPENAI_KEY else None,
+)
+atexit.register(HTTPX_CLIENT.close)
+# Wiederholungen bei 429/5xx (exponentielles Backoff, Retry-After wird beachtet)
+OPENAI_MAX_ATTEMPTS = 3
+OPENAI_RETRY_BASE_DELAY = 1.0  # Sekunden
+OPENAI_RETRY_MAX_DELAY = 30.0  # Sekunden
+# Parallele Jobs begrenzen (I/O-gebunden: YouTube + OpenAI)
+FACTCHECK_WORKERS = max(1, int(os.getenv("FACTCHECK_WORKERS", "8")))
+FACTCHECK_TIMEOUT = float(os.getenv("FACTCHECK_TIMEOUT", "150"))  # Sekunden
+# So lange wartet eine Anfrage auf einen freien Slot, bevor sie abgewiesen wird
+FACTCHECK_QUEUE_WAIT = float(os.getenv("FACTCHECK_QUEUE_WAIT", "30"))  # Sekunden
+FACTCHECK_SLOTS = threading.BoundedSemaphore(FACTCHECK_WORKERS)
+FACTCHECK_EXECUTOR = ThreadPoolExecutor(
+    max_workers=FACTCHECK_WORKERS, thread_name_prefix="factcheck"
+)
+# Laufende Jobs je Video-ID: gleichzeitige Anfragen teilen sich ein Future
+INFLIGHT_JOBS: dict[str, Future] = {}
+INFLIGHT_LOCK = threading.Lock()
 
-# Cache-Verzeichnis (persistiert pro Kaltstart; auf Render /tmp möglich)
-CACHE_DIR = "/tmp/yt_caps_cache"
-os.makedirs(CACHE_DIR, exist_ok=True)
+# Cache für Transkripte, Fehlschläge und LLM-Ergebnisse in SQLite (WAL; persistiert pro Kaltstart, auf Render /tmp möglich)
+CACHE_DB_PATH = os.getenv("CACHE_DB_PATH", "/tmp/yt_caps_cache.db")
+CACHE_DB_LOCK = threading.Lock()
+# Transkripte ab dieser Größe (Bytes) zlib-komprimiert ablegen
+TRANSCRIPT_COMPRESS_MIN = 4096
 
 # Welche Sprachen sollen priorisiert werden?
 SUBTITLE_LANG_PREF = [
@@ -46,110 +82,331 @@ if not SUBTITLE_LANG_PREF:
 SUBTITLE_LANG_PREF = [lang for lang in SUBTITLE_LANG_PREF if lang]
 SUBTITLE_LANG_PREF_SET = set(SUBTITLE_LANG_PREF)
 
+# Abstand zwischen YouTube-Abrufen (AIMD: schrumpft bei Erfolg, verdoppelt sich bei Blockierung)
+YOUTUBE_MIN_INTERVAL = 1.0  # Sekunden
+YOUTUBE_MAX_INTERVAL = 30.0  # Sekunden
+# Länger wartet ein Abruf nicht auf seinen Slot, sonst bricht er sofort ab (FACTCHECK_TIMEOUT einhalten)
+YOUTUBE_MAX_WAIT = float(os.getenv("YOUTUBE_MAX_WAIT", "10"))  # Sekunden
+_yt_interval = 1.5
+_yt_next_slot = 0.0
+_YT_PACE_LOCK = threading.Lock()
+
 # TTLs für Fehler-Caching
 YOUTUBE_FAILURE_TTL = float(os.getenv("YOUTUBE_FAILURE_TTL", "900"))  # Sekunden
 YOUTUBE_TRANSCRIPT_MISS_TTL = float(
     os.getenv("YOUTUBE_TRANSCRIPT_MISS_TTL", "1800")
 )
-FAILED_TRANSCRIPT_CACHE: dict[str, dict[str, float | str]] = {}
+# Wie lange geladene Untertitel aus dem Cache verwendet werden
+YOUTUBE_TRANSCRIPT_CACHE_TTL = float(os.getenv("YOUTUBE_TRANSCRIPT_CACHE_TTL", "86400"))  # Sekunden
+
+# Vorkompilierte Muster
+# Ein Durchlauf statt urlparse + parse_qs: watch?v=, /shorts/, /live/ und youtu.be
+# (optional mit Port; watch-IDs wie bisher länger als 5 Zeichen)
+_RE_YOUTUBE_URL = re.compile(
+    r"^https?://(?:"
+    r"(?:[a-z0-9-]+\.)*youtube\.com(?::\d+)?/(?:"
+    r"watch/?\?(?:[^#]*?&)??v=(?P<watch>[\w-]{6,})(?:[&#]|$)"
+    r"|(?:shorts|live)/(?P<path>[\w-]{5,})(?:[/?#]|$))"
+    r"|(?:www\.)?youtu\.be(?::\d+)?/(?P<short>[\w-]{5,})/?(?:[?#]|$)"
+    r")",
+    re.IGNORECASE | re.ASCII,
+)
+_RE_TAG = re.compile(r"<[^>]+>")
+_RE_BATCH_ID = re.compile(r"batch_[A-Za-z0-9]+")
+_RE_URL_TAIL = re.compile(r"[.,;:)\]}\u203a\u2019\u201d\"']+$")
+# Schema-konforme URL ohne Satzzeichen am Ende – braucht keine Nachbearbeitung
+_RE_URL_OK = re.compile(r"https?://[^\s)\]}]*[^\s)\]}.,;:\u203a\u2019\u201d\"']")
+
+# Lange Transkripte: in Stücke à OPENAI_CHUNK_CHARS Zeichen teilen und parallel prüfen
+OPENAI_CHUNK_CHARS = 12000
+OPENAI_MAX_CHUNKS = max(1, int(os.getenv("OPENAI_MAX_CHUNKS", "3")))
+OPENAI_CONCURRENCY = max(1, int(os.getenv("OPENAI_CONCURRENCY", "4")))
+OPENAI_EXECUTOR = ThreadPoolExecutor(max_workers=OPENAI_CONCURRENCY, thread_name_prefix="openai")
+# Gleichzeitige OpenAI-Requests über alle Jobs begrenzen (Cache-Treffer brauchen keinen Slot)
+OPENAI_SLOTS = threading.BoundedSemaphore(OPENAI_CONCURRENCY)
+
+# Version des Antwort-Schemas; bei Änderungen am Prompt/Schema erhöhen,
+# damit alte LLM-Cache-Einträge nicht mehr getroffen werden.
+FACTS_SCHEMA_VERSION = 1
+# Nur (nahezu) deterministische Antworten werden gecacht.
+LLM_CACHE_MAX_TEMPERATURE = 0.1
+# Wie lange LLM-Ergebnisse in SQLite gültig bleiben
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(30 * 86400)))  # Sekunden
+# In-Process-LRU vor dem Datei-Cache (Doppelklicks, Retries im selben Worker)
+_LLM_MEM: "OrderedDict[str, tuple[list[dict], float]]" = OrderedDict()
+_LLM_MEM_LOCK = threading.Lock()
+_LLM_MEM_MAX = 128
+# In-Process-LRU vor dem SQLite-Transkript-Cache (erneut geklickte URLs)
+_TRANSCRIPT_MEM: "OrderedDict[str, tuple[str, str | None, float]]" = OrderedDict()
+_TRANSCRIPT_MEM_LOCK = threading.Lock()
+_TRANSCRIPT_MEM_MAX = 256
 
 # =========================
 # Utilities
 # =========================
-def is_valid_youtube_url(url: str) -> bool:
+def json_loads(data: bytes | str):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def json_dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+@lru_cache(maxsize=1024)
+def extract_video_id(url: str | None) -> str | None:
+    """
+    Prüft die YouTube-URL und liefert die Video-ID – oder None, wenn die URL ungültig ist.
+    Reine Funktion, daher per lru_cache memoisiert (in CPython threadsicher).
+    """
     if not url:
-        return False
-    try:
-        p = urlparse(url)
-        if p.scheme not in ("http", "https"):
-            return False
-        host = (p.netloc or "").lower()
-        path = (p.path or "")
-        if "youtube.com" in host:
-            qs = parse_qs(p.query or "")
-            if path.startswith("/watch"):
-                return "v" in qs and len(qs["v"][0]) > 5
-            if path.startswith("/shorts/") and len(path.split("/")[2]) >= 5:
-                return True
-            if path.startswith("/live/") and len(path.split("/")[2]) >= 5:
-                return True
-            return False
-        if "youtu.be" in host:
-            parts = [seg for seg in (p.path or "").split("/") if seg]
-            return len(parts) == 1 and len(parts[0]) >= 5
-        return False
-    except Exception:
-        return False
-
-def get_video_id(url: str) -> str | None:
-    p = urlparse(url)
-    host = (p.netloc or "").lower()
-    path = (p.path or "")
-    if "youtube.com" in host and path.startswith("/watch"):
-        qs = parse_qs(p.query or "")
-        return qs.get("v", [None])[0]
-    if "youtu.be" in host:
-        parts = [seg for seg in path.split("/") if seg]
-        return parts[0] if parts else None
-    if "youtube.com" in host and path.startswith("/shorts/"):
-        return path.split("/")[2]
-    if "youtube.com" in host and path.startswith("/live/"):
-        return path.split("/")[2]
-    return None
+        return None
+    m = _RE_YOUTUBE_URL.match(url)
+    if not m:
+        return None
+    return m.group("watch") or m.group("path") or m.group("short")
+
+_CACHE_DB: sqlite3.Connection | None = None
+_CACHE_DB_PID: int | None = None
+
+def _cache_db() -> sqlite3.Connection:
+    """
+    SQLite-Verbindung pro Prozess (nach gunicorn-Fork neu öffnen); nur unter CACHE_DB_LOCK verwenden.
+    """
+    global _CACHE_DB, _CACHE_DB_PID
+    if _CACHE_DB is None or _CACHE_DB_PID != os.getpid():
+        db = sqlite3.connect(CACHE_DB_PATH, check_same_thread=False, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS transcripts("
+            "video_id TEXT PRIMARY KEY, text BLOB NOT NULL, lang TEXT, ts REAL NOT NULL, zipped INTEGER NOT NULL)"
+        )
+        db.execute("CREATE TABLE IF NOT EXISTS facts(key TEXT PRIMARY KEY, items BLOB NOT NULL, ts REAL NOT NULL)")
+        db.execute("CREATE TABLE IF NOT EXISTS fails(video_id TEXT PRIMARY KEY, expires REAL NOT NULL, message TEXT)")
+        # Nur hier eingereichte Batches werden ausgeliefert; keys = LLM-Cache-Keys aller Teile des Videos,
+        # result ist gesetzt, sobald der Batch abgeschlossen ist
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS batches("
+            "batch_id TEXT PRIMARY KEY, ts REAL NOT NULL, video_id TEXT NOT NULL, keys BLOB NOT NULL, result BLOB)"
+        )
+        _CACHE_DB, _CACHE_DB_PID = db, os.getpid()
+    return _CACHE_DB
+
+# Abgelaufene Zeilen aller Cache-Tabellen werden alle CACHE_SWEEP_EVERY Schreibvorgänge gesammelt gelöscht
+CACHE_SWEEP_EVERY = 128
+_cache_writes = 0
+
+def _count_cache_write(db: sqlite3.Connection, now: float):
+    """
+    Nach jedem Schreibvorgang aufrufen; nur unter CACHE_DB_LOCK verwenden.
+    Wanduhr statt monotonic, da die Zeitstempel persistiert werden.
+    """
+    global _cache_writes
+    _cache_writes += 1
+    if _cache_writes < CACHE_SWEEP_EVERY:
+        return
+    _cache_writes = 0
+    db.execute("DELETE FROM transcripts WHERE ts < ?", (now - YOUTUBE_TRANSCRIPT_CACHE_TTL,))
+    db.execute("DELETE FROM facts WHERE ts < ?", (now - LLM_CACHE_TTL,))
+    db.execute("DELETE FROM fails WHERE expires < ?", (now,))
+    db.execute("DELETE FROM batches WHERE ts < ?", (now - LLM_CACHE_TTL,))
+
+def _transcript_mem_get(video_id: str):
+    with _TRANSCRIPT_MEM_LOCK:
+        entry = _TRANSCRIPT_MEM.get(video_id)
+        if entry is None:
+            return None
+        if time.time() - entry[2] > YOUTUBE_TRANSCRIPT_CACHE_TTL:
+            del _TRANSCRIPT_MEM[video_id]
+            return None
+        _TRANSCRIPT_MEM.move_to_end(video_id)
+        return entry
 
-def cache_path(video_id: str) -> str:
-    return os.path.join(CACHE_DIR, f"{video_id}.json")
+def _transcript_mem_put(video_id: str, text: str, lang: str | None, ts: float):
+    with _TRANSCRIPT_MEM_LOCK:
+        _TRANSCRIPT_MEM[video_id] = (text, lang, ts)
+        _TRANSCRIPT_MEM.move_to_end(video_id)
+        while len(_TRANSCRIPT_MEM) > _TRANSCRIPT_MEM_MAX:
+            _TRANSCRIPT_MEM.popitem(last=False)
 
 def get_cached_transcript(video_id: str):
-    fp = cache_path(video_id)
-    if os.path.exists(fp):
-        try:
-            with open(fp, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            return data.get("text"), data.get("lang")
-        except Exception:
+    entry = _transcript_mem_get(video_id)
+    if entry is not None:
+        return entry[0], entry[1]
+    try:
+        with CACHE_DB_LOCK:
+            row = _cache_db().execute(
+                "SELECT text, lang, ts, zipped FROM transcripts WHERE video_id = ?", (video_id,)
+            ).fetchone()
+        if not row:
             return None, None
-    return None, None
+        data, lang, ts, zipped = row
+        if time.time() - ts > YOUTUBE_TRANSCRIPT_CACHE_TTL:
+            return None, None
+        if zipped:
+            data = zlib.decompress(data)
+        text = data.decode("utf-8")
+        _transcript_mem_put(video_id, text, lang, ts)
+        return text, lang
+    except (sqlite3.Error, zlib.error, UnicodeDecodeError):
+        return None, None
 
 def set_cached_transcript(video_id: str, text: str, lang: str | None):
+    ts = time.time()
+    _transcript_mem_put(video_id, text, lang, ts)
+    data = text.encode("utf-8")
+    zipped = len(data) > TRANSCRIPT_COMPRESS_MIN
+    if zipped:
+        data = zlib.compress(data, 1)
+    try:
+        with CACHE_DB_LOCK:
+            db = _cache_db()
+            db.execute(
+                "INSERT OR REPLACE INTO transcripts(video_id, text, lang, ts, zipped) VALUES (?, ?, ?, ?, ?)",
+                (video_id, data, lang, ts, int(zipped)),
+            )
+            _count_cache_write(db, ts)
+    except sqlite3.Error:
+        pass
+
+def llm_cache_key(model: str, system_prompt: str, clipped_text: str, lang_hint: str) -> str:
+    payload = {
+        "model": model,
+        "system": system_prompt,
+        "text": clipped_text,
+        "lang": lang_hint,
+        "schema_version": FACTS_SCHEMA_VERSION,
+    }
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()
+
+def _llm_mem_get(key: str) -> list[dict] | None:
+    with _LLM_MEM_LOCK:
+        entry = _LLM_MEM.get(key)
+        if entry is None:
+            return None
+        if time.time() - entry[1] > LLM_CACHE_TTL:
+            del _LLM_MEM[key]
+            return None
+        _LLM_MEM.move_to_end(key)
+        return entry[0]
+
+def _llm_mem_put(key: str, items: list[dict], ts: float):
+    with _LLM_MEM_LOCK:
+        _LLM_MEM[key] = (items, ts)
+        _LLM_MEM.move_to_end(key)
+        while len(_LLM_MEM) > _LLM_MEM_MAX:
+            _LLM_MEM.popitem(last=False)
+
+def get_cached_llm(key: str) -> list[dict] | None:
+    items = _llm_mem_get(key)
+    if items is not None:
+        return items
+    try:
+        with CACHE_DB_LOCK:
+            row = _cache_db().execute("SELECT items, ts FROM facts WHERE key = ?", (key,)).fetchone()
+        if not row or time.time() - row[1] > LLM_CACHE_TTL:
+            return None
+        items, ts = json_loads(row[0]), row[1]
+    except (sqlite3.Error, ValueError):
+        return None
+    if isinstance(items, list):
+        _llm_mem_put(key, items, ts)
+        return items
+    return None
+
+def set_cached_llm(key: str, result: list[dict]):
+    now = time.time()
+    _llm_mem_put(key, result, now)
     try:
-        with open(cache_path(video_id), "w", encoding="utf-8") as f:
-            json.dump({"text": text, "lang": lang}, f)
-    except Exception:
+        with CACHE_DB_LOCK:
+            db = _cache_db()
+            db.execute(
+                "INSERT OR REPLACE INTO facts(key, items, ts) VALUES (?, ?, ?)",
+                (key, json_dumps(result), now),
+            )
+            _count_cache_write(db, now)
+    except sqlite3.Error:
         pass
 
+# Fehlschläge liegen ebenfalls in SQLite, damit sie Neustarts und gunicorn-Worker überdauern
 def mark_transcript_failure(video_id: str, message: str, ttl: float | None = None):
-    expires_at = time.time() + (ttl if ttl is not None else YOUTUBE_FAILURE_TTL)
-    FAILED_TRANSCRIPT_CACHE[video_id] = {"expires": expires_at, "message": message}
+    now = time.time()  # Wanduhr, da die Ablaufzeiten persistiert werden
+    expires_at = now + (ttl if ttl is not None else YOUTUBE_FAILURE_TTL)
+    try:
+        with CACHE_DB_LOCK:
+            db = _cache_db()
+            db.execute(
+                "INSERT OR REPLACE INTO fails(video_id, expires, message) VALUES (?, ?, ?)",
+                (video_id, expires_at, message),
+            )
+            _count_cache_write(db, now)
+    except sqlite3.Error:
+        pass
 def clear_transcript_failure(video_id: str):
-    FAILED_TRANSCRIPT_CACHE.pop(video_id, None)
+    try:
+        with CACHE_DB_LOCK:
+            _cache_db().execute("DELETE FROM fails WHERE video_id = ?", (video_id,))
+    except sqlite3.Error:
+        pass
 def get_recent_transcript_failure(video_id: str) -> str | None:
-    data = FAILED_TRANSCRIPT_CACHE.get(video_id)
-    if not data:
-        return None
-    expires = float(data.get("expires", 0))
-    if time.time() > expires:
-        FAILED_TRANSCRIPT_CACHE.pop(video_id, None)
+    try:
+        with CACHE_DB_LOCK:
+            db = _cache_db()
+            row = db.execute("SELECT expires, message FROM fails WHERE video_id = ?", (video_id,)).fetchone()
+            if not row:
+                return None
+            expires, message = row
+            if time.time() > expires:
+                db.execute("DELETE FROM fails WHERE video_id = ?", (video_id,))
+                return None
+    except sqlite3.Error:
         return None
-    return str(data.get("message", ""))
+    return message or ""
 
 def vtt_to_text(vtt: str) -> str:
     """
     Entfernt Meta-Infos, Zeitstempel und HTML-Tags und gibt Klartext zurück.
+    Ein einziger Durchlauf über die Zeilen; Leerzeilen entfallen dabei direkt.
     """
-    vtt = re.sub(r"WEBVTT.*\n", "", vtt, flags=re.IGNORECASE)
-    vtt = re.sub(r"\d{2}:\d{2}:\d{2}\.\d{3} --> .*", "", vtt)
-    vtt = re.sub(r"<[^>]+>", "", vtt)
-    vtt = re.sub(r"\s*\n\s*\n+", "\n", vtt)
-    return vtt.strip()
+    out = []
+    tag_re = _RE_TAG
+    for line in vtt.splitlines():
+        line = line.strip()
+        if not line or line[:6].upper() == "WEBVTT" or "-->" in line:
+            continue
+        if "<" in line:
+            line = tag_re.sub("", line).strip()
+            if not line:
+                continue
+        out.append(line)
+    return "\n".join(out)
+
+_YTT_LOCAL = threading.local()
+
+def _get_transcript_api():
+    """
+    Eine YouTubeTranscriptApi-Instanz (inkl. HTTP-Session) pro Thread, lazy erzeugt.
+    Die Klasse ist laut Bibliothek nicht threadsicher (Consent-Cookie, Header der Session);
+    die Pool-Threads leben lange, Keep-Alive-Verbindungen bleiben also erhalten.
+    """
+    api = getattr(_YTT_LOCAL, "api", None)
+    if api is None:
+        from youtube_transcript_api import YouTubeTranscriptApi
+
+        api = _YTT_LOCAL.api = YouTubeTranscriptApi()
+    return api
 
 def _list_transcripts_compat(video_id: str):
     """
     Unterstützt sowohl neuere (list_transcripts) als auch ältere (instance.list) API-Versionen.
     """
+    from youtube_transcript_api import YouTubeTranscriptApi
+
     if hasattr(YouTubeTranscriptApi, "list_transcripts"):
         return YouTubeTranscriptApi.list_transcripts(video_id)
-    api = YouTubeTranscriptApi()
+    api = _get_transcript_api()
     if hasattr(api, "list"):
         return api.list(video_id)
     raise RuntimeError("Inkompatible youtube-transcript-api Version – bitte aktualisieren.")
@@ -159,11 +416,56 @@ def _normalize_lang_hint(lang: str | None) -> str | None:
         return None
     return lang.split("-")[0].lower()
 
+def _segment_text(seg) -> str:
+    """
+    Text eines Untertitel-Segments: dict (ältere API) oder Snippet-Objekt mit .text (ab 1.0).
+    """
+    text = seg.get("text") if isinstance(seg, dict) else getattr(seg, "text", None)
+    return text.strip() if text else ""
+
+def wait_for_youtube_slot():
+    """
+    Reserviert den nächsten freien Zeitpunkt für einen YouTube-Abruf und wartet bis dahin.
+    Gleichzeitige Aufrufer reihen sich im Abstand von _yt_interval hintereinander ein;
+    liegt der Slot mehr als YOUTUBE_MAX_WAIT entfernt, wird nichts reserviert.
+    """
+    global _yt_next_slot
+    with _YT_PACE_LOCK:
+        now = time.monotonic()
+        start = max(now, _yt_next_slot)
+        if start - now > YOUTUBE_MAX_WAIT:
+            raise YouTubeThrottledError(
+                "Es laufen gerade viele YouTube-Abrufe. Bitte in einer Minute erneut versuchen."
+            )
+        _yt_next_slot = start + _yt_interval
+    if start > now:
+        time.sleep(start - now)
+
+def _youtube_fetch_succeeded():
+    global _yt_interval
+    with _YT_PACE_LOCK:
+        _yt_interval = max(YOUTUBE_MIN_INTERVAL, _yt_interval * 0.9)
+
+def _youtube_fetch_blocked():
+    global _yt_interval
+    with _YT_PACE_LOCK:
+        _yt_interval = min(YOUTUBE_MAX_INTERVAL, _yt_interval * 2.0)
+
 def fetch_public_captions(video_id: str, languages: list[str] | None = None):
     """
     Verwendet ausschließlich öffentlich verfügbare Untertitel über die YouTube Transcript API.
     """
+    # Lazy Import: Worker, die nie Untertitel laden (z.B. nur /healthz), sparen den Import beim Kaltstart
+    from youtube_transcript_api import (
+        TranscriptsDisabled,
+        NoTranscriptFound,
+        CouldNotRetrieveTranscript,
+        RequestBlocked,
+        IpBlocked,
+    )
+
     languages = [lang.lower() for lang in languages] if languages else SUBTITLE_LANG_PREF
+    wait_for_youtube_slot()
     try:
         transcripts = _list_transcripts_compat(video_id)
     except TranscriptsDisabled as e:
@@ -175,6 +477,7 @@ def fetch_public_captions(video_id: str, languages: list[str] | None = None):
             "Für dieses Video sind keine öffentlichen Untertitel verfügbar."
         ) from e
     except (RequestBlocked, IpBlocked) as e:
+        _youtube_fetch_blocked()
         raise TranscriptFetchError(
             "YouTube hat zu viele Anfragen erkannt. Bitte einige Minuten warten und erneut versuchen."
         ) from e
@@ -190,29 +493,44 @@ def fetch_public_captions(video_id: str, languages: list[str] | None = None):
         ) from e
 
     def try_fetch(language: str):
+        # find_transcript wäre nur manuell ∪ generiert – und würde einen bereits
+        # geprüften Track ein zweites Mal von YouTube laden.
         for finder in (
             "find_manually_created_transcript",
             "find_generated_transcript",
-            "find_transcript",
         ):
             method = getattr(transcripts, finder, None)
             if not method:
                 continue
             try:
                 transcript = method([language])
-                segments = transcript.fetch()
             except NoTranscriptFound:
                 continue
-            text = " ".join(
-                (seg.get("text") or "").strip() for seg in segments if seg.get("text")
-            ).strip()
+            # Erst der Download geht wirklich an YouTube – auch er wird getaktet und überwacht
+            wait_for_youtube_slot()
+            try:
+                segments = transcript.fetch()
+            except (RequestBlocked, IpBlocked) as e:
+                _youtube_fetch_blocked()
+                raise TranscriptFetchError(
+                    "YouTube hat zu viele Anfragen erkannt. Bitte einige Minuten warten und erneut versuchen."
+                ) from e
+            except CouldNotRetrieveTranscript as e:
+                _youtube_fetch_blocked()
+                raise TranscriptFetchError(
+                    "Untertitel konnten nicht von YouTube geladen werden."
+                ) from e
+            _youtube_fetch_succeeded()
+            text = " ".join([t for t in map(_segment_text, segments) if t])
             if text:
                 lang_hint = _normalize_lang_hint(transcript.language_code or language)
                 return text, lang_hint or language
         return None
 
-    for lang in languages:
-        result = try_fetch(lang)
+    # Sprachen in Präferenz-Reihenfolge nacheinander probieren: jeder Download kostet einen
+    # Pacer-Slot, nach dem ersten Treffer wird nichts mehr von YouTube geladen.
+    for language in languages:
+        result = try_fetch(language)
         if result:
             return result
 
@@ -221,27 +539,144 @@ def fetch_public_captions(video_id: str, languages: list[str] | None = None):
     )
 
 def normalize_urls(urls: list[str]) -> list[str]:
+    """
+    Bereinigt Quellen-URLs; was danach keine gültige http(s)-URL ist, wird verworfen.
+    """
     out = []
-    for u in urls or []:
-        u = (u or "").strip()
-        u = u.rstrip(".,;:)]}›’”\"'")
-        if u.startswith("www."):
+    for raw in urls or ():
+        if not raw:
+            continue
+        if _RE_URL_OK.fullmatch(raw):
+            out.append(raw)
+            continue
+        u = _RE_URL_TAIL.sub("", raw.strip())
+        if u.startswith("www.") and "://" not in u:
             u = "https://" + u
-        out.append(u)
+        if _RE_URL_OK.fullmatch(u):
+            out.append(u)
     return out
 
 def format_sources_markdown(urls: list[str]) -> str:
-    urls = [u for u in urls or [] if u]
-    if not urls:
-        return ""
-    parts = []
-    for url in urls:
-        parts.append(f"[{url}]({url})")
-    return "\n".join(parts)
+    return "\n".join([f"[{u}]({u})" for u in urls or () if u])
+
+def facts_to_rows(facts: list[dict]) -> list[dict]:
+    return [
+        {"claim": x["claim"], "verdict": x["verdict"], "sources": format_sources_markdown(x["sources"])}
+        for x in facts
+    ]
 
 # =========================
 # OpenAI – synchron, ohne Proxy
 # =========================
+FACTS_SYSTEM_PROMPT = (
+    "Du bist ein Faktenprüf-Assistent. "
+    "Extrahiere NUR objektiv überprüfbare Aussagen (Zahlen/Daten/Fakten). "
+    "Bewerte jede Aussage als 'richtig' | 'falsch' | 'unklar'. "
+    "Gib pro Eintrag 1–3 GLAUBWÜRDIGE QUELLEN als vollständige, direkte URLs mit Protokoll an "
+    "Gib für falsche Aussagen Quellen an, welche das eindeutig widerlegen"
+    "(z.B. https://bundesregierung.de/...; keine Startseiten, keine Kurz-URLs, keine Platzhalter). "
+    "Wenn keine spezifische Quelle sicher ist, setze verdict='unklar' und sources=[]. "
+    "Keine Erklärsätze außerhalb der JSON-Struktur."
+)
+
+FACTS_SCHEMA = {
+    "name": "facts_response",
+    "schema": {
+        "type": "object",
+        "properties": {
+            "items": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "required": ["claim", "verdict", "sources"],
+                    "properties": {
+                        "claim":   {"type": "string"},
+                        "verdict": {"type": "string", "enum": ["richtig", "falsch", "unklar"]},
+                        "sources": {
+                            "type": "array",
+                            "items": {
+                                "type": "string",
+                                "pattern": "^https?://[^\\s)\\]}]+$"
+                            },
+                            "minItems": 0,
+                            "maxItems": 3
+                        }
+                    },
+                    "additionalProperties": False
+                }
+            }
+        },
+        "required": ["items"],
+        "additionalProperties": False
+    },
+    "strict": True
+}
+
+# Typisierte Sicht auf die Antwort; der Decoder validiert beim Parsen
+class FactItem(msgspec.Struct):
+    claim: str
+    verdict: Literal["richtig", "falsch", "unklar"]
+    sources: list[str] = []
+
+
+class FactsResponse(msgspec.Struct):
+    items: list[FactItem]
+
+
+FACTS_DECODER = msgspec.json.Decoder(FactsResponse)
+
+FACTS_RESPONSE_FORMAT = {"type": "json_schema", "json_schema": FACTS_SCHEMA}
+OPENAI_MODEL = "gpt-4o-mini"  # Structured Outputs fähig und günstig
+OPENAI_TEMPERATURE = 0.1
+
+# Feste Felder des Request-Bodys; pro Aufruf kommen nur die Messages hinzu
+FACTS_BASE_BODY = {
+    "model": OPENAI_MODEL,
+    "temperature": OPENAI_TEMPERATURE,
+    "response_format": FACTS_RESPONSE_FORMAT,
+    "max_tokens": 800,
+}
+FACTS_SYSTEM_MESSAGE = {"role": "system", "content": FACTS_SYSTEM_PROMPT}
+
+def _facts_request_body(clipped: str, lang_hint: str) -> dict:
+    return {
+        **FACTS_BASE_BODY,
+        "messages": [
+            FACTS_SYSTEM_MESSAGE,
+            {"role": "user", "content": f"Sprache: {lang_hint}\nTranskript:\n{clipped}"},
+        ],
+    }
+
+def _parse_facts_content(content: str) -> list[dict]:
+    try:
+        parsed = FACTS_DECODER.decode(content)
+    except msgspec.DecodeError as e:
+        raise RuntimeError(f"OpenAI-Antwort entspricht nicht dem Schema: {e}") from e
+
+    # Normalize
+    return [
+        {"claim": x.claim, "verdict": x.verdict, "sources": normalize_urls(x.sources)}
+        for x in parsed.items
+    ]
+
+def _openai_post(path: str, **kwargs) -> httpx.Response:
+    """
+    POST an die OpenAI-API; Rate-Limits (429) und Serverfehler (5xx) werden mit Backoff wiederholt.
+    """
+    for attempt in range(OPENAI_MAX_ATTEMPTS):
+        r = HTTPX_CLIENT.post(path, **kwargs)
+        retryable = r.status_code == 429 or r.status_code >= 500
+        if not retryable or attempt == OPENAI_MAX_ATTEMPTS - 1:
+            break
+        try:
+            delay = float(r.headers["Retry-After"])
+        except (KeyError, ValueError):
+            delay = OPENAI_RETRY_BASE_DELAY * 2 ** attempt
+        time.sleep(min(delay * random.uniform(0.9, 1.2), OPENAI_RETRY_MAX_DELAY))
+    if r.status_code >= 400:
+        raise RuntimeError(f"OpenAI error {r.status_code}: {r.text}")
+    return r
+
 def openai_facts(text: str, lang_hint: str = "de"):
     """
     Synchronously call OpenAI (structured outputs, robust JSON).
@@ -249,82 +684,364 @@ def openai_facts(text: str, lang_hint: str = "de"):
     if not OPENAI_KEY:
         raise RuntimeError("OPENAI_API_KEY fehlt.")
 
-    system = (
-        "Du bist ein Faktenprüf-Assistent. "
-        "Extrahiere NUR objektiv überprüfbare Aussagen (Zahlen/Daten/Fakten). "
-        "Bewerte jede Aussage als 'richtig' | 'falsch' | 'unklar'. "
-        "Gib pro Eintrag 1–3 GLAUBWÜRDIGE QUELLEN als vollständige, direkte URLs mit Protokoll an "
-        "Gib für falsche Aussagen Quellen an, welche das eindeutig widerlegen"
-        "(z.B. https://bundesregierung.de/...; keine Startseiten, keine Kurz-URLs, keine Platzhalter). "
-        "Wenn keine spezifische Quelle sicher ist, setze verdict='unklar' und sources=[]. "
-        "Keine Erklärsätze außerhalb der JSON-Struktur."
+    # Kurze Transkripte unverändert übernehmen, nur lange abschneiden
+    clipped = text if len(text) <= OPENAI_CHUNK_CHARS else text[:OPENAI_CHUNK_CHARS]
+
+    cache_key = None
+    if OPENAI_TEMPERATURE <= LLM_CACHE_MAX_TEMPERATURE:
+        cache_key = llm_cache_key(OPENAI_MODEL, FACTS_SYSTEM_PROMPT, clipped, lang_hint)
+        cached = get_cached_llm(cache_key)
+        if cached is not None:
+            return cached
+
+    body = _facts_request_body(clipped, lang_hint)
+    headers = {"Content-Type": "application/json"}
+    with OPENAI_SLOTS:
+        r = _openai_post("/v1/chat/completions", headers=headers, content=json_dumps(body))  # kein Proxy!
+
+    # Envelope direkt aus den Rohbytes parsen (ohne httpx-Encoding-Erkennung)
+    content = json_loads(r.content)["choices"][0]["message"]["content"]
+    out = _parse_facts_content(content)
+
+    if cache_key is not None:
+        set_cached_llm(cache_key, out)
+    return out
+
+def split_transcript(text: str, max_chars: int = OPENAI_CHUNK_CHARS,
+                     max_chunks: int = OPENAI_MAX_CHUNKS) -> list[str]:
+    """
+    Teilt das Transkript an Wortgrenzen in höchstens max_chunks Stücke à max_chars Zeichen.
+    """
+    chunks = []
+    start, n = 0, len(text)
+    while start < n and len(chunks) < max_chunks:
+        end = start + max_chars
+        if end < n:
+            cut = text.rfind(" ", start, end)
+            if cut > start:
+                end = cut
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        start = end
+    return chunks
+
+def _claim_key(claim: str) -> str:
+    return " ".join(claim.casefold().split())
+
+def _merge_facts(fact_lists) -> list[dict]:
+    out, seen = [], set()
+    for facts in fact_lists:
+        for x in facts:
+            key = _claim_key(x["claim"])
+            if key not in seen:
+                seen.add(key)
+                out.append(x)
+    return out
+
+def openai_facts_batch(chunks: list[str], lang_hint: str = "de"):
+    """
+    Prüft mehrere Transkript-Teile parallel und führt die Ergebnisse zusammen.
+    Gleiche Aussagen (Groß-/Kleinschreibung, Leerraum ignoriert) erscheinen nur einmal.
+    """
+    return _merge_facts(
+        OPENAI_EXECUTOR.map(lambda chunk: openai_facts(chunk, lang_hint=lang_hint), chunks)
+    )
+
+def fact_check_transcript(text: str, lang_hint: str = "de"):
+    """
+    Prüft das Transkript; lange Transkripte werden aufgeteilt und die Teile parallel geprüft.
+    """
+    chunks = split_transcript(text)
+    if len(chunks) <= 1:
+        return openai_facts(text, lang_hint=lang_hint)
+    return openai_facts_batch(chunks, lang_hint=lang_hint)
+
+# =========================
+# OpenAI Batch API – 50 % günstiger, Ergebnis innerhalb von 24 h
+# =========================
+def _batch_chunks(text: str) -> list[str]:
+    # Gleiche Aufteilung wie fact_check_transcript, damit die LLM-Cache-Keys übereinstimmen
+    chunks = split_transcript(text)
+    return chunks if len(chunks) > 1 else [text[:OPENAI_CHUNK_CHARS]]
+
+def submit_facts_batch(video_id: str, text: str, lang_hint: str = "de") -> dict:
+    """
+    Reiht die Faktenprüfung eines Transkripts über die OpenAI Batch API ein.
+    Bereits gecachte Teile werden nicht erneut eingereicht; sind alle Teile gecacht,
+    wird kein Batch angelegt und das Ergebnis direkt geliefert ("id" ist dann None).
+    """
+    if not OPENAI_KEY:
+        raise RuntimeError("OPENAI_API_KEY fehlt.")
+
+    use_cache = OPENAI_TEMPERATURE <= LLM_CACHE_MAX_TEMPERATURE
+    keys = []
+    lines = []
+    for chunk in _batch_chunks(text):
+        key = llm_cache_key(OPENAI_MODEL, FACTS_SYSTEM_PROMPT, chunk, lang_hint)
+        keys.append(key)
+        if use_cache and get_cached_llm(key) is not None:
+            continue
+        lines.append(json_dumps({
+            "custom_id": f"{video_id}:{key}",
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": _facts_request_body(chunk, lang_hint),
+        }))
+
+    if not lines:
+        return {"id": None, "status": "completed", "facts": {video_id: _cached_batch_facts(keys)}}
+
+    r = _openai_post(
+        "/v1/files",
+        data={"purpose": "batch"},
+        files={"file": (f"facts_{video_id}.jsonl", b"\n".join(lines), "application/jsonl")},
     )
+    input_file_id = json_loads(r.content)["id"]
 
-    clipped = text[:12000]
-    messages = [
-        {"role": "system", "content": system},
-        {"role": "user", "content": f"Sprache: {lang_hint}\nTranskript:\n{clipped}"}
-    ]
+    body = {"input_file_id": input_file_id, "endpoint": "/v1/chat/completions", "completion_window": "24h"}
+    r = _openai_post(
+        "/v1/batches",
+        headers={"Content-Type": "application/json"},
+        content=json_dumps(body),
+    )
+    batch = json_loads(r.content)
+    _register_batch(batch["id"], video_id, keys)
+    return {"id": batch["id"], "status": batch.get("status")}
 
-    schema = {
-        "name": "facts_response",
-        "schema": {
-            "type": "object",
-            "properties": {
-                "items": {
-                    "type": "array",
-                    "items": {
-                        "type": "object",
-                        "required": ["claim", "verdict", "sources"],
-                        "properties": {
-                            "claim":   {"type": "string"},
-                            "verdict": {"type": "string", "enum": ["richtig", "falsch", "unklar"]},
-                            "sources": {
-                                "type": "array",
-                                "items": {
-                                    "type": "string",
-                                    "pattern": "^https?://[^\\s)\\]}]+$"
-                                },
-                                "minItems": 0,
-                                "maxItems": 3
-                            }
-                        },
-                        "additionalProperties": False
-                    }
-                }
-            },
-            "required": ["items"],
-            "additionalProperties": False
-        },
-        "strict": True
-    }
+def _cached_batch_facts(keys: list[str]) -> list[dict]:
+    # Alle Teile eines Videos aus dem LLM-Cache zusammenführen (auch die nicht eingereichten)
+    return _merge_facts([facts for facts in map(get_cached_llm, keys) if facts is not None])
 
-    body = {
-        "model": "gpt-4o-mini",  # Structured Outputs fähig und günstig
-        "temperature": 0.1,
-        "messages": messages,
-        "response_format": {"type": "json_schema", "json_schema": schema},
-        "max_tokens": 800,
-    }
+def _register_batch(batch_id: str, video_id: str, keys: list[str]):
+    now = time.time()
+    try:
+        with CACHE_DB_LOCK:
+            db = _cache_db()
+            db.execute(
+                "INSERT OR REPLACE INTO batches(batch_id, ts, video_id, keys, result) VALUES (?, ?, ?, ?, NULL)",
+                (batch_id, now, video_id, json_dumps(keys)),
+            )
+            _count_cache_write(db, now)
+    except sqlite3.Error:
+        pass
+
+def _store_batch_result(batch_id: str, result: dict):
+    try:
+        with CACHE_DB_LOCK:
+            _cache_db().execute(
+                "UPDATE batches SET result = ?, ts = ? WHERE batch_id = ?",
+                (json_dumps(result), time.time(), batch_id),
+            )
+    except sqlite3.Error:
+        pass
+
+def _load_batch(batch_id: str):
+    """
+    (video_id, keys, gespeichertes Ergebnis oder None) für eine Batch-ID – None, wenn unbekannt.
+    """
+    try:
+        with CACHE_DB_LOCK:
+            row = _cache_db().execute(
+                "SELECT video_id, keys, result FROM batches WHERE batch_id = ?", (batch_id,)
+            ).fetchone()
+        if not row:
+            return None
+        video_id, keys, result = row
+        return video_id, json_loads(keys), json_loads(result) if result is not None else None
+    except (sqlite3.Error, ValueError):
+        return None
 
-    headers = {"Authorization": f"Bearer {OPENAI_KEY}", "Content-Type": "application/json"}
-    with httpx.Client(timeout=120) as cx:  # kein Proxy!
-        r = cx.post("https://api.openai.com/v1/chat/completions", headers=headers, json=body)
+def get_facts_batch(batch_id: str) -> dict | None:
+    """
+    Status eines Batches; nach Abschluss zusätzlich die Fakten je Video-ID.
+    Nur von submit_facts_batch eingereichte IDs werden abgefragt (sonst None).
+    Fertige Ergebnisse landen im LLM-Cache und werden danach ohne OpenAI-Abruf ausgeliefert.
+    """
+    if not _RE_BATCH_ID.fullmatch(batch_id or ""):
+        return None
+    stored = _load_batch(batch_id)
+    if stored is None:
+        return None
+    video_id, keys, result = stored
+    if result is not None:
+        return result
+
+    if not OPENAI_KEY:
+        raise RuntimeError("OPENAI_API_KEY fehlt.")
+
+    r = HTTPX_CLIENT.get(f"/v1/batches/{batch_id}")
     if r.status_code >= 400:
         raise RuntimeError(f"OpenAI error {r.status_code}: {r.text}")
+    batch = json_loads(r.content)
+    result = {"id": batch_id, "status": batch.get("status")}
+    output_file_id = batch.get("output_file_id")
+    if batch.get("status") in ("failed", "expired", "cancelled"):
+        _store_batch_result(batch_id, result)
+        return result
+    if batch.get("status") != "completed" or not output_file_id:
+        return result
 
-    content = r.json()["choices"][0]["message"]["content"]
-    parsed = json.loads(content)  # dank Schema: valides JSON-Objekt
-    items = parsed.get("items", [])
+    r = HTTPX_CLIENT.get(f"/v1/files/{output_file_id}/content")
+    if r.status_code >= 400:
+        raise RuntimeError(f"OpenAI error {r.status_code}: {r.text}")
 
-    # Normalize
-    out = []
-    for x in items:
-        claim = x.get("claim", "")
-        verdict = x.get("verdict", "")
-        sources = normalize_urls(x.get("sources", []))
-        out.append({"claim": claim, "verdict": verdict, "sources": sources})
-    return out
+    # Ergebnisse in den LLM-Cache übernehmen, danach alle Teile des Videos (auch die bereits
+    # vorher gecachten und daher nicht eingereichten) daraus zusammenführen
+    for line in r.content.splitlines():
+        if not line.strip():
+            continue
+        entry = json_loads(line)
+        _, _, cache_key = (entry.get("custom_id") or "").partition(":")
+        response = entry.get("response") or {}
+        if response.get("status_code") != 200:
+            continue
+        try:
+            facts = _parse_facts_content(response["body"]["choices"][0]["message"]["content"])
+        except (KeyError, IndexError, RuntimeError):
+            continue
+        if cache_key in keys:
+            set_cached_llm(cache_key, facts)
+
+    result["facts"] = {video_id: _cached_batch_facts(keys)}
+    _store_batch_result(batch_id, result)
+    return result
+
+# =========================
+# Pipeline
+# =========================
+def load_transcript(video_id: str):
+    """
+    Untertitel aus dem Cache oder von YouTube; Fehlschläge werden gemerkt und wiederverwendet,
+    damit wiederholte Klicks YouTube nicht erneut belasten.
+    Liefert (text, lang, aus_cache, fehler) – fehler ist None oder (Meldung, Details).
+    """
+    # (2) Cache prüfen
+    cached_text, cached_lang = get_cached_transcript(video_id)
+    if cached_text:
+        return cached_text, cached_lang, True, None
+
+    recent_failure = get_recent_transcript_failure(video_id)
+    if recent_failure:
+        return None, None, False, (recent_failure, f"YouTube-Antwort: {recent_failure}")
+
+    # Untertitel laden (öffentliche YouTube-Captions)
+    try:
+        text, lang = fetch_public_captions(video_id, SUBTITLE_LANG_PREF)
+    except TranscriptUnavailableError as e:
+        message = str(e) or "Für dieses Video sind keine Untertitel verfügbar. Bitte anderes Video probieren."
+        mark_transcript_failure(video_id, message, ttl=YOUTUBE_TRANSCRIPT_MISS_TTL)
+        detail = f"YouTube-Antwort: {e.__cause__ or 'Keine weiteren Details von YouTube.'}"
+        return None, None, False, (message, detail)
+    except YouTubeThrottledError as e:
+        # Nur lokal gedrosselt: nicht als Fehlschlag des Videos merken
+        return None, None, False, (str(e), "")
+    except TranscriptFetchError as e:
+        message = str(e) or "Untertitel konnten nicht geladen werden."
+        mark_transcript_failure(video_id, message, ttl=YOUTUBE_FAILURE_TTL / 2)
+        print(f"Transcript fetch failed for {video_id}: {e}")
+        return None, None, False, (message, f"Fehlerdetails: {e.__cause__ or e}")
+
+    # (2) Cache setzen
+    set_cached_transcript(video_id, text, lang)
+    clear_transcript_failure(video_id)
+    return text, lang, False, None
+
+def analyze_video(video_id: str):
+    """
+    Lädt die Untertitel (Cache oder YouTube) und prüft die Fakten.
+    Liefert die Werte für die Callback-Outputs.
+    """
+    text, lang, from_cache, error = load_transcript(video_id)
+    if error:
+        message, detail = error
+        return ("", "", message, detail, [])
+
+    # LLM‑Faktenprüfung (ohne Proxy)
+    facts = fact_check_transcript(text, lang_hint=lang or "de")
+
+    rows = facts_to_rows(facts)
+    if from_cache:
+        return ("Faktenprüfung abgeschlossen (aus Cache).",
+                f"Untertitel (Cache) – Sprache: {lang or 'de/en'}.",
+                "",
+                "",
+                rows)
+    return ("Faktenprüfung abgeschlossen.",
+            f"Untertitel gefunden (Quelle: YouTube, Sprache: {lang or 'de/en'}).",
+            "",
+            "",
+            rows)
+
+def queue_video_batch(video_id: str):
+    """
+    Lädt die Untertitel wie analyze_video und reiht die Faktenprüfung als Batch ein.
+    Liefert den Inhalt für batch_info.
+    """
+    text, lang, _, error = load_transcript(video_id)
+    if error:
+        return error[0]
+
+    try:
+        batch = submit_facts_batch(video_id, text, lang_hint=lang or "de")
+    except (RuntimeError, httpx.HTTPError) as e:
+        print(f"Batch submit failed for {video_id}: {e}")
+        return "⚠️ Batch konnte nicht eingereiht werden."
+    if batch["id"] is None:
+        return "Alle Teile sind bereits geprüft – „Fakten prüfen“ liefert das Ergebnis sofort aus dem Cache."
+    return html.Span([
+        "Batch eingereiht – Status und Ergebnis: ",
+        html.A(f"/batch/{batch['id']}", href=f"/batch/{batch['id']}", target="_blank"),
+    ])
+
+def _finish_job(key: str, fut: Future):
+    with INFLIGHT_LOCK:
+        if INFLIGHT_JOBS.get(key) is fut:
+            del INFLIGHT_JOBS[key]
+    FACTCHECK_SLOTS.release()
+
+def _submit_job(key: str, fn, *args) -> Future | None:
+    """
+    Startet fn(*args) im Worker-Pool oder hängt sich an einen laufenden Job mit demselben Schlüssel.
+    Ein neuer Job belegt einen FACTCHECK_SLOTS-Slot, bis er fertig ist – nicht nur, solange jemand
+    auf ihn wartet. Slots = Worker, ein Job mit Slot läuft also sofort an. None, wenn kein Slot frei wird.
+    """
+    with INFLIGHT_LOCK:
+        fut = INFLIGHT_JOBS.get(key)
+        if fut is not None:
+            return fut
+    if not FACTCHECK_SLOTS.acquire(timeout=FACTCHECK_QUEUE_WAIT):
+        return None
+    with INFLIGHT_LOCK:
+        fut = INFLIGHT_JOBS.get(key)
+        if fut is None:
+            try:
+                fut = INFLIGHT_JOBS[key] = FACTCHECK_EXECUTOR.submit(fn, *args)
+            except RuntimeError:  # Executor bereits heruntergefahren
+                FACTCHECK_SLOTS.release()
+                raise
+            created = True
+        else:
+            created = False
+    if not created:
+        # Während des Wartens hat ein anderer Aufrufer den Job gestartet
+        FACTCHECK_SLOTS.release()
+        return fut
+    # außerhalb des Locks: läuft sofort, falls der Job schon fertig ist
+    fut.add_done_callback(lambda f: _finish_job(key, f))
+    return fut
+
+def submit_analysis(video_id: str) -> Future | None:
+    """
+    Startet analyze_video für das Video oder hängt sich an einen laufenden Job für dasselbe Video.
+    """
+    return _submit_job(video_id, analyze_video, video_id)
+
+def submit_batch_queueing(video_id: str) -> Future | None:
+    """
+    Wie submit_analysis, aber für das Einreihen als Batch (eigener Job-Schlüssel).
+    """
+    return _submit_job(f"batch:{video_id}", queue_video_batch, video_id)
 
 # =========================
 # Dash App
@@ -348,12 +1065,21 @@ app.layout = html.Div(
                     "Fakten prüfen",
                     id="analyze",
                     n_clicks=0,
-                    disabled=False,  # wird im Callback via Lock „virtuell“ serialisiert
+                    disabled=False,  # Parallelität wird über Worker-Slots je Job begrenzt
                     style={"padding": "12px 16px", "border": "none", "borderRadius": "10px",
                            "background": "#2563eb", "color": "white", "fontWeight": 600, "cursor": "pointer"},
                 ),
+                html.Button(
+                    "Als Batch einreihen",
+                    id="queue_batch",
+                    n_clicks=0,
+                    title="Günstiger über die OpenAI Batch API – Ergebnis innerhalb von 24 h",
+                    style={"padding": "12px 16px", "border": "1px solid #2563eb", "borderRadius": "10px",
+                           "background": "white", "color": "#2563eb", "fontWeight": 600, "cursor": "pointer"},
+                ),
             ],
         ),
+        html.Div(id="batch_info", style={"fontSize": "12px", "color": "#4b5563", "marginTop": "4px"}),
         html.Div(
             id="youtube_error_response",
             style={
@@ -405,81 +1131,67 @@ app.layout = html.Div(
     prevent_initial_call=True,
 )
 def run_pipeline(n_clicks, n_submit, url):
-    # (6) Sofortiger Doppel-Trigger-Schutz & Serialisierung
-    if not FACTCHECK_LOCK.acquire(blocking=False):
-        return ("Bitte warten – ein anderer Auftrag läuft bereits.", "", "", "", [])
+    # Basic Validierungen (URL + Video-ID in einem Durchlauf)
+    video_id = extract_video_id(url)
+    if not video_id:
+        return ("❌ Keine gültige YouTube‑URL.", "", "", "", [])
+
+    if not OPENAI_KEY:
+        return ("⚠️ OPENAI_API_KEY fehlt.", "", "", "", [])
+
+    # (6) Begrenzte Parallelität: auf einen freien Slot warten statt sofort abzuweisen;
+    # der Slot gehört dem Job und wird erst frei, wenn dieser fertig ist
+    fut = submit_analysis(video_id)
+    if fut is None:
+        # Nur den Status ändern – Ergebnisse/Tabelle bleiben unangetastet
+        return ("Bitte später erneut versuchen – es laufen bereits zu viele Aufträge.",
+                no_update, no_update, no_update, no_update)
 
     try:
-        # Basic Validierungen
-        if not url or not is_valid_youtube_url(url):
-            return ("❌ Keine gültige YouTube‑URL.", "", "", "", [])
-
-        if not OPENAI_KEY:
-            return ("⚠️ OPENAI_API_KEY fehlt.", "", "", "", [])
-
-        video_id = get_video_id(url)
-        if not video_id:
-            return ("❌ Konnte Video‑ID nicht ermitteln.", "", "", "", [])
-
-        # (2) Cache prüfen
-        cached_text, cached_lang = get_cached_transcript(video_id)
-        if cached_text:
-            clear_transcript_failure(video_id)
-            facts = openai_facts(cached_text, lang_hint=cached_lang or "de")
-            return ("Faktenprüfung abgeschlossen (aus Cache).",
-                    f"Untertitel (Cache) – Sprache: {cached_lang or 'de/en'}.",
-                    "",
-                    "",
-                    [{"claim": x["claim"], "verdict": x["verdict"], "sources": format_sources_markdown(x["sources"])} for x in facts])
-
-        recent_failure = get_recent_transcript_failure(video_id)
-        if recent_failure:
-            yt_detail = f"YouTube-Antwort: {recent_failure}"
-            return ("", "", recent_failure, yt_detail, [])
-        
-        # Untertitel laden (öffentliche YouTube-Captions)
-        try:
-            text, lang = fetch_public_captions(video_id, SUBTITLE_LANG_PREF)
-        except TranscriptUnavailableError as e:
-            message = str(e) or "Für dieses Video sind keine Untertitel verfügbar. Bitte anderes Video probieren."
-            mark_transcript_failure(video_id, message, ttl=YOUTUBE_TRANSCRIPT_MISS_TTL)
-            detail = f"YouTube-Antwort: {e.__cause__ or 'Keine weiteren Details von YouTube.'}"
-            return ("", "", message, detail, [])
-        except TranscriptFetchError as e:
-            message = str(e) or "Untertitel konnten nicht geladen werden."
-            mark_transcript_failure(video_id, message, ttl=YOUTUBE_FAILURE_TTL / 2)
-            print(f"Transcript fetch failed for {video_id}: {e}")
-            detail = f"Fehlerdetails: {e.__cause__ or e}"
-            return ("", "", message, detail, [])
-
-        # (2) Cache setzen
-        set_cached_transcript(video_id, text, lang)
-        clear_transcript_failure(video_id)
-
-        # LLM‑Faktenprüfung (ohne Proxy)
-        facts = openai_facts(text, lang_hint=lang or "de")
-
-        rows = [
-            {
-                "claim": x["claim"],
-                "verdict": x["verdict"],
-                "sources": format_sources_markdown(x["sources"]),
-            }
-            for x in facts
-        ]
-        return ("Faktenprüfung abgeschlossen.",
-                f"Untertitel gefunden (Quelle: YouTube, Sprache: {lang or 'de/en'}).",
-                "",
-                "",
-                rows)
+        return fut.result(timeout=FACTCHECK_TIMEOUT)
+    except FutureTimeoutError:
+        return ("⏳ Die Analyse dauert länger als erwartet – bitte später erneut versuchen.", "", "", "", [])
 
-    finally:
-        FACTCHECK_LOCK.release()
+@app.callback(
+    Output("batch_info", "children"),
+    Input("queue_batch", "n_clicks"),
+    State("url", "value"),
+    prevent_initial_call=True,
+)
+def queue_batch(n_clicks, url):
+    video_id = extract_video_id(url)
+    if not video_id:
+        return "❌ Keine gültige YouTube‑URL."
+
+    if not OPENAI_KEY:
+        return "⚠️ OPENAI_API_KEY fehlt."
+
+    # Transkript-Laden läuft wie bei der Analyse im Worker-Pool (Slots, gleiche Jobs zusammengefasst)
+    fut = submit_batch_queueing(video_id)
+    if fut is None:
+        return "Bitte später erneut versuchen – es laufen bereits zu viele Aufträge."
+    try:
+        return fut.result(timeout=FACTCHECK_TIMEOUT)
+    except FutureTimeoutError:
+        return "⏳ Das Einreihen dauert länger als erwartet – bitte später erneut versuchen."
+
+# Status/Ergebnis eines eingereihten Batches
+@server.route("/batch/<batch_id>")
+def batch_status(batch_id):
+    try:
+        result = get_facts_batch(batch_id)
+    except (RuntimeError, httpx.HTTPError) as e:
+        print(f"Batch status failed for {batch_id}: {e}")
+        return jsonify({"id": batch_id, "error": "Batch-Status konnte nicht abgerufen werden."}), 502
+    if result is None:
+        return jsonify({"id": batch_id, "error": "Unbekannter Batch."}), 404
+    return jsonify(result), 200
 
 # Healthcheck
 @server.route("/healthz")
 def healthz():
-    return "ok", 200
+    # Aktueller Abstand zwischen YouTube-Abrufen, zur Beobachtung des Limiters
+    return "ok", 200, {"X-YouTube-Interval": f"{_yt_interval:.2f}"}
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 8050))